@@ -4,6 +4,20 @@ from datetime import datetime
 import json
 
 
+def _parse_dates(values):
+    """
+    Преобразование колонки в datetime: быстрый разбор ISO 8601,
+    при другом формате - прежний разбор с автоопределением
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    try:
+        return pd.to_datetime(values, format='ISO8601', cache=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, errors='coerce', cache=True)
+
+
 def load_environmental_data(file_path, required_columns=None):
     """
     Загрузка и комплексная валидация данных экологического мониторинга
@@ -64,7 +78,7 @@ def load_environmental_data(file_path, required_columns=None):
 
         # Преобразование даты
         if 'date' in data.columns:
-            data['date'] = pd.to_datetime(data['date'], errors='coerce')
+            data['date'] = _parse_dates(data['date'])
             invalid_dates = data['date'].isna().sum()
             if invalid_dates > 0:
                 validation_report['warnings'].append(f"Обнаружено {invalid_dates} некорректных дат")
@@ -75,7 +89,7 @@ def load_environmental_data(file_path, required_columns=None):
             for alt in date_alternatives:
                 if alt in data.columns:
                     print(f"🕐 Используем альтернативную колонку даты: {alt}")
-                    data['date'] = pd.to_datetime(data[alt], errors='coerce')
+                    data['date'] = _parse_dates(data[alt])
                     invalid_dates = data['date'].isna().sum()
                     if invalid_dates > 0:
                         validation_report['warnings'].append(f"Обнаружено {invalid_dates} некорректных дат в {alt}")
@@ -139,23 +153,26 @@ def detect_anomalies_mad(data, pollutant_column, sensitivity='auto'):
     sensitivity_map = {'low': 3.5, 'medium': 3.0, 'high': 2.5}
     threshold = sensitivity_map.get(sensitivity, 3.0)
 
+    values = working_data[pollutant_column].to_numpy(dtype=np.float64)
+
     if sensitivity == 'auto':
-        cv = working_data[pollutant_column].std() / working_data[pollutant_column].mean()
+        cv = values.std(ddof=1) / values.mean()
         threshold = 3.5 if cv > 1.0 else 2.8 if cv > 0.5 else 2.5
 
-    # Расчет MAD
-    median = working_data[pollutant_column].median()
-    mad = (working_data[pollutant_column] - median).abs().median()
+    # Расчет MAD: отклонения считаются один раз и переиспользуются для маски
+    median = np.median(values)
+    deviations = np.abs(values - median)
+    mad = np.median(deviations)
 
     if mad == 0:
-        mad = working_data[pollutant_column].std() / 1.4826
+        mad = values.std(ddof=1) / 1.4826
 
     # Определение границ
     lower_bound = median - threshold * mad
     upper_bound = median + threshold * mad
 
-    # Идентификация аномалий
-    anomalies_mask = (working_data[pollutant_column] < lower_bound) | (working_data[pollutant_column] > upper_bound)
+    # Идентификация аномалий (эквивалентно выходу за [lower_bound, upper_bound])
+    anomalies_mask = deviations > threshold * mad
     clean_data = working_data[~anomalies_mask]
     anomalies_data = working_data[anomalies_mask]
 
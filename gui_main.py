@@ -4,6 +4,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import json
+import math
 import os
 import sys
 import threading
@@ -13,6 +14,11 @@ from datetime import datetime, timedelta
 import numpy as np
 from tkcalendar import DateEntry
 
+try:
+    import orjson  # Быстрая сериализация отчетов (необязательная зависимость)
+except ImportError:
+    orjson = None
+
 # Добавляем пути к нашим модулям
 sys.path.append('.')
 import data_manager as dm
@@ -20,6 +26,47 @@ import analysis_core as ac
 import visualization_engine as ve
 
 
+def _serialize_identity(obj):
+    return obj
+
+
+def _serialize_float(obj):
+    """NaN и бесконечности записываются как null (в JSON их нет)"""
+    obj = float(obj)
+    return obj if math.isfinite(obj) else None
+
+
+def _serialize_fallback(obj):
+    """Медленный путь make_serializable для типов вне таблицы диспетчеризации"""
+    if isinstance(obj, (int, float, str, bool)):
+        return obj
+    elif obj is pd.NaT or obj is pd.NA:
+        return None
+    elif isinstance(obj, (pd.Timestamp, pd.DatetimeIndex)):
+        return obj.isoformat()
+    elif hasattr(obj, 'dtype'):  # numpy types
+        return obj.tolist() if hasattr(obj, 'tolist') else str(obj)
+    else:
+        return str(obj)
+
+
+# Диспетчеризация по точному типу; dict/list/tuple обходятся в make_serializable
+_SERIALIZE_DISPATCH = {
+    int: _serialize_identity,
+    float: _serialize_float,
+    str: _serialize_identity,
+    bool: _serialize_identity,
+    type(None): _serialize_identity,
+    dict: dict,
+    list: list,
+    tuple: list,
+    pd.Timestamp: pd.Timestamp.isoformat,
+    np.ndarray: np.ndarray.tolist,
+    np.float64: _serialize_float,
+    np.int64: int,
+}
+
+
 class AnalysisThread(threading.Thread):
     """Поток для выполнения анализа"""
 
@@ -53,9 +100,16 @@ class AirQualityAnalyzerGUI:
         self.analysis_results = {}
         self.current_plots = []
         self.regions = {}
+        self._region_col = None
+        self._region_index = {}
+        self._region_index_data = None  # DataFrame, по которому построен индекс
         self.analysis_thread = None
         self.is_analyzing = False
 
+        # Детальный прогноз выводится по запросу, страницами
+        self.forecast_details = None
+        self.forecast_details_offset = 0
+
         # Переменные для прогресс-бара
         self.progress_var = tk.DoubleVar()
         self.progress_label_var = tk.StringVar(value="Готов")
@@ -263,6 +317,10 @@ class AirQualityAnalyzerGUI:
                                               command=self.cancel_analysis, state='disabled')
         self.cancel_analysis_btn.pack(side='left', padx=5)
 
+        self.forecast_details_btn = ttk.Button(button_frame, text="Детали прогноза",
+                                               command=self.show_forecast_details, state='disabled')
+        self.forecast_details_btn.pack(side='left', padx=5)
+
         # ✅ СОХРАНЯЕМ ФРЕЙМ РЕЗУЛЬТАТОВ АНАЛИЗА (СУЩЕСТВУЮЩИЙ КОД)
         results_frame = ttk.LabelFrame(self.analysis_tab, text="Результаты анализа", padding=10)
         results_frame.pack(fill='both', expand=True, padx=5, pady=5)
@@ -404,78 +462,6 @@ class AirQualityAnalyzerGUI:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка экспорта: {str(e)}")
 
-    def show_summary(self):
-        """Показать сводный отчет"""
-        if self.data is None:
-            messagebox.showwarning("Предупреждение", "Сначала загрузите данные")
-            return
-
-        try:
-            summary_text = "📊 СВОДНЫЙ ОТЧЕТ ПО АНАЛИЗУ КАЧЕСТВА ВОЗДУХА\n\n"
-            summary_text += "=" * 50 + "\n\n"
-
-            # Информация о данных
-            summary_text += "📁 ДАННЫЕ:\n"
-            summary_text += f"• Записей: {len(self.data)}\n"
-            if 'date' in self.data.columns:
-                min_date = self.data['date'].min()
-                max_date = self.data['date'].max()
-                summary_text += f"• Период: {min_date} - {max_date}\n"
-                summary_text += f"• Дней данных: {(max_date - min_date).days}\n"
-            summary_text += f"• Целевой показатель: {self.pollutant_var.get()}\n"
-            summary_text += f"• Регион: {self.region_var.get()}\n\n"
-
-            # Статистика по данным
-            summary_text += "📈 СТАТИСТИКА ДАННЫХ:\n"
-            pollutant = self.pollutant_var.get()
-            if pollutant in self.data.columns:
-                data_stats = self.data[pollutant].describe()
-                summary_text += f"• Среднее: {data_stats.get('mean', 0):.2f}\n"
-                summary_text += f"• Медиана: {data_stats.get('50%', 0):.2f}\n"
-                summary_text += f"• Стандартное отклонение: {data_stats.get('std', 0):.2f}\n"
-                summary_text += f"• Минимум: {data_stats.get('min', 0):.2f}\n"
-                summary_text += f"• Максимум: {data_stats.get('max', 0):.2f}\n"
-                summary_text += f"• Непустых значений: {self.data[pollutant].notna().sum()}\n\n"
-
-            # Результаты анализа
-            summary_text += "🔍 РЕЗУЛЬТАТЫ АНАЛИЗА:\n"
-
-            if 'trends' in self.analysis_results:
-                trends = self.analysis_results['trends']
-                direction = trends.get('overall_direction', 'Не определен')
-                change_pct = trends.get('change_percentage', 0)
-                summary_text += f"• Тренд: {direction} ({change_pct:+.2f}%)\n"
-
-            if 'aqi' in self.analysis_results and 'overall' in self.analysis_results['aqi']:
-                aqi = self.analysis_results['aqi']['overall']
-                summary_text += f"• Общий AQI: {aqi.get('aqi', 'N/A')} ({aqi.get('category', 'N/A')})\n"
-                summary_text += f"• Основной загрязнитель: {aqi.get('dominant_pollutant', 'N/A')}\n"
-
-            if 'forecast' in self.analysis_results:
-                forecast = self.analysis_results['forecast']
-                horizon = forecast.get('forecast_horizon', 'N/A')
-                if 'forecast_stats' in forecast:
-                    stats = forecast['forecast_stats']
-                    summary_text += f"• Прогноз ({horizon} ч): среднее {stats.get('mean', 0):.2f} "
-                    summary_text += f"(диапазон: {stats.get('min', 0):.2f}-{stats.get('max', 0):.2f})\n"
-
-            if 'seasonal' in self.analysis_results:
-                seasonal = self.analysis_results['seasonal']
-                if 'peak_hour' in seasonal:
-                    peak = seasonal['peak_hour']
-                    summary_text += f"• Пиковый час: {peak.get('hour', 'N/A')}:00 "
-                    summary_text += f"({peak.get('concentration', 0):.2f})\n"
-
-            summary_text += "\n" + "=" * 50 + "\n"
-            summary_text += f"Отчет сгенерирован: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-
-            # Очищаем и вставляем текст
-            self.summary_text.delete(1.0, tk.END)
-            self.summary_text.insert(1.0, summary_text)
-
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка создания отчета: {str(e)}")
-
     def update_progress(self, value, label=""):
         """Обновление прогресс-бара"""
         self.progress_var.set(value)
@@ -508,26 +494,6 @@ class AirQualityAnalyzerGUI:
             self.progress_var.set(0)
             self.progress_label_var.set("Готов")
 
-    def cancel_analysis(self):
-        """Отмена текущего анализа"""
-        if self.analysis_thread and self.analysis_thread.is_alive():
-            # Сразу разблокируем все кнопки
-            self.set_analysis_buttons_state(True)
-
-            # Показываем сообщение об отмене
-            self.analysis_text.insert(tk.END, "\n\n❌ Анализ отменен пользователем\n")
-            self.analysis_text.see(tk.END)
-
-            # Сбрасываем прогресс
-            self.progress_var.set(0)
-            self.progress_label_var.set("Готов")
-
-            # Останавливаем мониторинг прогресса
-            self.is_analyzing = False
-
-            # Даем потоку немного времени на завершение
-            self.analysis_thread.join(timeout=1.0)
-
     def analyze_in_thread(self, analysis_func, func_name, *args, **kwargs):
         """Запуск анализа в отдельном потоке"""
         if self.is_analyzing:
@@ -708,8 +674,16 @@ class AirQualityAnalyzerGUI:
         self.analyze_in_thread(seasonal_analysis, "сезонный анализ")
         self.pending_update = self.display_seasonal_results
 
+    def _reset_forecast_details(self):
+        """Сброс детального прогноза: кнопка не должна дописывать устаревшие строки"""
+        self.forecast_details = None
+        self.forecast_details_offset = 0
+        self.forecast_details_btn.config(state='disabled')
+
     def display_trends_results(self, trends):
         """Отображение результатов анализа трендов"""
+        # Текст результатов заменяется целиком, прежний прогноз в нем больше не виден
+        self._reset_forecast_details()
         self.analysis_text.config(state="normal")
         if not trends or 'error' in trends:
             result_text = "❌ Не удалось выполнить анализ трендов\n"
@@ -734,12 +708,12 @@ class AirQualityAnalyzerGUI:
 
             self.analysis_results['trends'] = trends
 
-        self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, result_text)
+        self.analysis_text.replace('1.0', tk.END, result_text)
         self.analysis_text.config(state="disabled")
 
     def display_forecast_results(self, forecast):
         """Отображение результатов прогнозирования"""
+        self._reset_forecast_details()
         self.analysis_text.config(state="normal")
         if not forecast or 'error' in forecast:
             result_text = "❌ Не удалось выполнить прогнозирование\n"
@@ -759,48 +733,41 @@ class AirQualityAnalyzerGUI:
                 result_text += f"  Макс: {stats.get('max', 0):.2f}\n"
                 result_text += f"  Станд. откл.: {stats.get('std', 0):.2f}\n"
 
-            # Детальный прогноз по часам - ВЫВОДИМ ВСЕ ЧАСЫ ИЛИ РАЗУМНОЕ КОЛИЧЕСТВО
+            # Детальный прогноз по часам выводится кнопкой "Детали прогноза"
             if 'final_forecast' in forecast and 'forecast_dates' in forecast:
-                forecast_horizon = forecast.get('forecast_horizon', 24)
+                self.forecast_details = (forecast['final_forecast'], forecast['forecast_dates'])
+                self.forecast_details_offset = 0
+                self.forecast_details_btn.config(state='normal')
+                result_text += f"\nДетальный прогноз ({len(forecast['final_forecast'])} ч.): "
+                result_text += "нажмите «Детали прогноза»\n"
 
-                # Если горизонт большой, показываем первые 24 часа и последние 6 часов
-                if forecast_horizon > 30:
-                    result_text += f"\nДетальный прогноз (первые 24 часа и последние 6 часов):\n"
-
-                    # Первые 24 часа
-                    first_forecasts = forecast['final_forecast'][:24]
-                    first_dates = forecast['forecast_dates'][:24]
-
-                    for i, (date, value) in enumerate(zip(first_dates, first_forecasts)):
-                        time_str = pd.to_datetime(date).strftime('%m-%d %H:%M')
-                        result_text += f"  {time_str}: {value:.2f}\n"
-
-                    result_text += f"  ... (пропущено {forecast_horizon - 30} часов) ...\n"
+            self.analysis_results['forecast'] = forecast
 
-                    # Последние 6 часов
-                    last_forecasts = forecast['final_forecast'][-6:]
-                    last_dates = forecast['forecast_dates'][-6:]
+        # Дописываем в конец без повторной вставки всего буфера
+        self.analysis_text.insert(tk.END, "\n\n\n" + result_text)
+        self.analysis_text.config(state="disabled")
 
-                    for i, (date, value) in enumerate(zip(last_dates, last_forecasts)):
-                        time_str = pd.to_datetime(date).strftime('%m-%d %H:%M')
-                        result_text += f"  {time_str}: {value:.2f}\n"
+    def show_forecast_details(self, page_size=100):
+        """Вывод следующей страницы детального прогноза"""
+        if not self.forecast_details:
+            return
 
-                else:
-                    # Для небольших горизонтов показываем все часы
-                    result_text += f"\nДетальный прогноз (все {forecast_horizon} часов):\n"
-                    forecasts = forecast['final_forecast']
-                    dates = forecast['forecast_dates']
+        values, dates = self.forecast_details
+        offset = self.forecast_details_offset
+        page_values = values[offset:offset + page_size]
+        page_dates = pd.to_datetime(dates[offset:offset + page_size]).strftime('%m-%d %H:%M')
 
-                    for i, (date, value) in enumerate(zip(dates, forecasts)):
-                        time_str = pd.to_datetime(date).strftime('%m-%d %H:%M')
-                        result_text += f"  {time_str}: {value:.2f}\n"
+        result_text = f"Детальный прогноз ({offset + 1}-{offset + len(page_values)} из {len(values)}):\n"
+        result_text += "".join(f"  {time_str}: {value:.2f}\n" for time_str, value in zip(page_dates, page_values))
 
-            self.analysis_results['forecast'] = forecast
+        self.forecast_details_offset = offset + len(page_values)
+        if self.forecast_details_offset >= len(values):
+            self.forecast_details_btn.config(state='disabled')
 
-        current_text = self.analysis_text.get(1.0, tk.END)
-        self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, current_text + "\n\n" + result_text)
+        self.analysis_text.config(state="normal")
+        self.analysis_text.insert(tk.END, "\n" + result_text)
         self.analysis_text.config(state="disabled")
+        self.analysis_text.see(tk.END)
 
     def display_aqi_results(self, aqi_results):
         """Отображение результатов AQI"""
@@ -828,9 +795,8 @@ class AirQualityAnalyzerGUI:
 
             self.analysis_results['aqi'] = aqi_results
 
-        current_text = self.analysis_text.get(1.0, tk.END)
-        self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, current_text + "\n\n" + result_text)
+        # Дописываем в конец без повторной вставки всего буфера
+        self.analysis_text.insert(tk.END, "\n\n\n" + result_text)
         self.analysis_text.config(state="disabled")
 
     def display_seasonal_results(self, seasonal):
@@ -866,9 +832,8 @@ class AirQualityAnalyzerGUI:
 
             self.analysis_results['seasonal'] = seasonal
 
-        current_text = self.analysis_text.get(1.0, tk.END)
-        self.analysis_text.delete(1.0, tk.END)
-        self.analysis_text.insert(1.0, current_text + "\n\n" + result_text)
+        # Дописываем в конец без повторной вставки всего буфера
+        self.analysis_text.insert(tk.END, "\n\n\n" + result_text)
         self.analysis_text.config(state="disabled")
 
     def load_data(self):
@@ -887,6 +852,7 @@ class AirQualityAnalyzerGUI:
 
             # Загрузка данных
             self.data, validation_report = dm.load_environmental_data(file_path)
+            self._build_region_index()
 
             if self.data.empty:
                 messagebox.showerror("Ошибка", "Не удалось загрузить данные")
@@ -931,8 +897,7 @@ class AirQualityAnalyzerGUI:
                     avg = self.data[col].mean()
                     info_text += f"{col}: {non_null} записей ({percentage:.1f}%), среднее: {avg:.2f}\n"
 
-        self.info_text.delete(1.0, tk.END)
-        self.info_text.insert(1.0, info_text)
+        self.info_text.replace('1.0', tk.END, info_text)
         self.info_text.config(state="disabled")
 
     def update_regions(self):
@@ -940,21 +905,16 @@ class AirQualityAnalyzerGUI:
         if self.data is None:
             return
 
-        # Поиск колонки с регионами
-        region_columns = ['state', 'city', 'location', 'region', 'area']
-        region_col = None
-
-        for col in region_columns:
-            if col in self.data.columns:
-                region_col = col
-                break
+        self._ensure_region_index()
+        region_col = self._region_col
 
         if region_col:
-            regions = self.data[region_col].dropna().unique()
+            # Регионы в порядке первого появления, без пропусков - это ключи индекса
+            regions = list(self._region_index)
             self.regions = {region: region for region in regions}
 
             # Обновление комбобоксов
-            region_values = ["Все регионы"] + list(regions)
+            region_values = ["Все регионы"] + regions
             self.region_combo['values'] = region_values
             self.viz_region_combo['values'] = region_values
             self.data_region_combo['values'] = region_values
@@ -964,13 +924,34 @@ class AirQualityAnalyzerGUI:
             self.viz_region_combo['values'] = ["Все регионы"]
             self.data_region_combo['values'] = ["Все регионы"]
 
+    def _build_region_index(self):
+        """
+        Индекс позиций строк по регионам для быстрой фильтрации
+
+        Позиции действительны только для текущего self.data, поэтому индекс
+        строится заново при каждой замене данных.
+        """
+        # Поиск колонки с регионами
+        region_columns = ['state', 'city', 'location', 'region', 'area']
+        region_col = next((col for col in region_columns if col in self.data.columns), None)
+
+        self._region_col = region_col
+        self._region_index_data = self.data
+        if region_col:
+            self._region_index = dict(self.data.groupby(region_col, sort=False, observed=True).indices)
+        else:
+            self._region_index = {}
+
+    def _ensure_region_index(self):
+        """Перестроить индекс регионов, только если он построен не по текущему self.data"""
+        if self._region_index_data is not self.data:
+            self._build_region_index()
+
     def get_filtered_data(self, use_viz_filters=False, use_data_filters=False):
         """Получить отфильтрованные данные"""
         if self.data is None:
             return None
 
-        filtered_data = self.data.copy()
-
         # Выбор источника фильтров
         if use_viz_filters:
             region_var = self.viz_region_var
@@ -985,14 +966,13 @@ class AirQualityAnalyzerGUI:
             start_date = None
             end_date = None
 
-        # Фильтрация по региону
+        # Фильтрация по региону через предрасчитанный индекс позиций
         current_region = region_var.get()
-        if current_region != "Все регионы":
-            region_columns = ['state', 'city', 'location', 'region', 'area']
-            for col in region_columns:
-                if col in filtered_data.columns:
-                    filtered_data = filtered_data[filtered_data[col] == current_region]
-                    break
+        self._ensure_region_index()
+        if current_region != "Все регионы" and self._region_col:
+            filtered_data = self.data.iloc[self._region_index.get(current_region, [])]
+        else:
+            filtered_data = self.data.copy()
 
         # Фильтрация по дате
         if (use_viz_filters or use_data_filters) and 'date' in filtered_data.columns:
@@ -1031,22 +1011,6 @@ class AirQualityAnalyzerGUI:
 
             messagebox.showinfo("Успех", filter_info)
 
-    def reset_data_filters(self):
-        """Сбросить фильтры данных"""
-        self.data_region_var.set("Все регионы")
-        self.data_pollutant_var.set("Все показатели")
-
-        # Сброс календарей на текущую дату
-        today = datetime.now().date()
-        self.data_start_date_entry.set_date(today)
-        self.data_end_date_entry.set_date(today)
-
-        # Обновляем информацию и treeview
-        self.update_data_info({'records_loaded': len(self.data) if self.data else 0})
-        self.update_data_treeview(self.data)
-
-        messagebox.showinfo("Успех", "Фильтры сброшены")
-
     def update_filtered_data_info(self, filtered_data):
         """Обновление информации о отфильтрованных данных"""
         info_text = f"✅ Отфильтровано записей: {len(filtered_data)}\n"
@@ -1071,16 +1035,22 @@ class AirQualityAnalyzerGUI:
         # Статистика по всем показателям (оставляем для полноты информации)
         info_text += "Статистика по всем показателям:\n"
         numeric_columns = ['so2', 'no2', 'rspm', 'spm', 'pm2_5']
-        for col in numeric_columns:
-            if col in filtered_data.columns:
-                non_null = filtered_data[col].notna().sum()
-                percentage = (non_null / len(filtered_data)) * 100 if len(filtered_data) > 0 else 0
-                if non_null > 0:
-                    avg = filtered_data[col].mean()
-                    info_text += f"  {col}: {non_null} зап. ({percentage:.1f}%), ср.: {avg:.2f}\n"
+        present = [col for col in numeric_columns if col in filtered_data.columns]
+        if present:
+            # Один проход agg вместо notna().sum() и mean() по каждой колонке
+            agg = filtered_data[present].agg(['count', 'mean'])
+            counts = agg.loc['count'].to_numpy()
+            means = agg.loc['mean'].to_numpy()
+            percentages = counts / max(len(filtered_data), 1) * 100
+            info_text += "".join(
+                f"  {col}: {int(non_null)} зап. ({percentage:.1f}%), ср.: {avg:.2f}\n"
+                for col, non_null, percentage, avg in zip(present, counts, percentages, means)
+                if non_null > 0
+            )
 
-        self.info_text.delete(1.0, tk.END)
-        self.info_text.insert(1.0, info_text)
+        self.info_text.config(state="normal")
+        self.info_text.replace('1.0', tk.END, info_text)
+        self.info_text.config(state="disabled")
 
     def apply_viz_filters(self):
         """Применить фильтры для визуализации"""
@@ -1148,13 +1118,17 @@ class AirQualityAnalyzerGUI:
 
         try:
             # Создание графика
-            fig, ax = plt.subplots(figsize=(12, 6))
+            fig, ax = ve.get_figure(figsize=(12, 6))
 
             if 'date' in data.columns:
                 valid_data = data[['date', pollutant]].dropna().sort_values('date')
 
                 if len(valid_data) > 0:
-                    ax.plot(valid_data['date'], valid_data[pollutant],
+                    # Больше ~20 тыс. точек на графике все равно не различить:
+                    # M4 оставляет не более 4 точек на интервал, сохраняя пики
+                    plot_series = ve.m4_downsample(valid_data.set_index('date')[pollutant], 5000)
+
+                    ax.plot(plot_series.index, plot_series.to_numpy(dtype=np.float32),
                             alpha=0.7, linewidth=1, label=pollutant, color='steelblue')
 
                     # УЛУЧШЕННОЕ ФОРМАТИРОВАНИЕ ОСИ ВРЕМЕНИ
@@ -1163,25 +1137,23 @@ class AirQualityAnalyzerGUI:
                     max_date = dates.max()
                     date_range = max_date - min_date
 
-                    # Автоматический подбор формата в зависимости от диапазона дат
+                    # Автоматический подбор шага делений в зависимости от диапазона дат
                     if date_range.days > 365 * 2:  # Более 2 лет
-                        ax.xaxis.set_major_locator(mdates.YearLocator(1))
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+                        locator = mdates.YearLocator(1)
                     elif date_range.days > 180:  # 6 месяцев - 2 года
-                        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+                        locator = mdates.MonthLocator(interval=2)
                     elif date_range.days > 60:  # 2-6 месяцев
-                        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+                        locator = mdates.MonthLocator(interval=1)
                     elif date_range.days > 30:  # 1-2 месяца
-                        ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=2))
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+                        locator = mdates.WeekdayLocator(interval=2)
                     elif date_range.days > 7:  # 1 неделя - 1 месяц
-                        ax.xaxis.set_major_locator(mdates.WeekdayLocator(interval=1))
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+                        locator = mdates.WeekdayLocator(interval=1)
                     else:  # Менее 1 недели
-                        ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
-                        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+                        locator = mdates.DayLocator(interval=1)
+
+                    # Подписи формируются сразу для всех делений под выбранный шаг
+                    ax.xaxis.set_major_locator(locator)
+                    ax.xaxis.set_major_formatter(ve.get_date_formatter(locator))
 
                     # Устанавливаем rotation для всех подписей
                     plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
@@ -1203,9 +1175,6 @@ class AirQualityAnalyzerGUI:
                     ax.legend()
                     ax.grid(True, alpha=0.3)
 
-                    # Автоматическое调整布局
-                    plt.tight_layout()
-
                 else:
                     messagebox.showwarning("Предупреждение", "Нет данных для построения графика")
                     return
@@ -1354,7 +1323,7 @@ class AirQualityAnalyzerGUI:
     def clear_plots(self):
         """Очистка всех графиков"""
         for fig, canvas in self.current_plots:
-            plt.close(fig)
+            ve.release_figure(fig)
 
         for widget in self.plot_frame.winfo_children():
             widget.destroy()
@@ -1377,15 +1346,22 @@ class AirQualityAnalyzerGUI:
                 report = {
                     'timestamp': datetime.now().isoformat(),
                     'data_info': {
-                        'records': len(self.data) if self.data else 0,
+                        'records': len(self.data) if self.data is not None else 0,
                         'pollutant': self.pollutant_var.get(),
                         'region': self.region_var.get()
-                    },
-                    'analysis_results': self.make_serializable(self.analysis_results)
+                    }
                 }
 
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(report, f, ensure_ascii=False, indent=2)
+                # Одинаковое содержимое отчета независимо от наличия orjson
+                report['analysis_results'] = self.make_serializable(self.analysis_results)
+
+                if orjson is not None:
+                    options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                    with open(file_path, 'wb') as f:
+                        f.write(orjson.dumps(report, option=options))
+                else:
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        json.dump(report, f, ensure_ascii=False, indent=2)
 
                 messagebox.showinfo("Успех", f"Отчет сохранен: {file_path}")
 
@@ -1403,7 +1379,7 @@ class AirQualityAnalyzerGUI:
 
             if folder_path:
                 for i, (fig, _) in enumerate(self.current_plots):
-                    fig.savefig(f"{folder_path}/plot_{i + 1}.png", dpi=300, bbox_inches='tight')
+                    ve.save_visualization(fig, f"{folder_path}/plot_{i + 1}.png")
 
                 messagebox.showinfo("Успех", f"Графики экспортированы в: {folder_path}")
 
@@ -1445,27 +1421,52 @@ class AirQualityAnalyzerGUI:
                     stats = forecast['forecast_stats']
                     summary_text += f"Прогноз (среднее): {stats.get('mean', 0):.2f}\n"
 
-            self.summary_text.delete(1.0, tk.END)
-            self.summary_text.insert(1.0, summary_text)
+            self.summary_text.replace('1.0', tk.END, summary_text)
             self.summary_text.config(state="disabled")
 
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка создания отчета: {str(e)}")
 
     def make_serializable(self, obj):
-        """Рекурсивное преобразование объекта в сериализуемый формат"""
-        if isinstance(obj, (int, float, str, bool, type(None))):
-            return obj
-        elif isinstance(obj, dict):
-            return {key: self.make_serializable(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self.make_serializable(item) for item in obj]
-        elif isinstance(obj, (pd.Timestamp, pd.DatetimeIndex)):
-            return obj.isoformat()
-        elif hasattr(obj, 'dtype'):  # numpy types
-            return obj.tolist() if hasattr(obj, 'tolist') else str(obj)
-        else:
-            return str(obj)
+        """
+        Преобразование объекта в сериализуемый формат (обход через явный стек, без рекурсии)
+
+        Кортежи становятся списками, NaN/NaT - None: результат одинаково
+        записывается и через json, и через orjson.
+        """
+        root = [None]
+        stack = [(root, 0, obj)]
+
+        while stack:
+            parent, key, value = stack.pop()
+            convert = _SERIALIZE_DISPATCH.get(type(value))
+
+            if convert is None:
+                if isinstance(value, dict):
+                    convert = dict
+                elif isinstance(value, (list, tuple)):
+                    convert = list
+                else:
+                    convert = _serialize_fallback
+
+            if convert is dict:
+                # fromkeys сохраняет исходный порядок ключей
+                node = dict.fromkeys(value)
+                parent[key] = node
+                stack.extend((node, k, v) for k, v in value.items())
+            elif convert is list:
+                node = [None] * len(value)
+                parent[key] = node
+                stack.extend((node, i, v) for i, v in enumerate(value))
+            else:
+                converted = convert(value)
+                if type(converted) is type(value):
+                    parent[key] = converted
+                else:
+                    # Результат другого типа (например, список из tolist()) обрабатываем повторно
+                    stack.append((parent, key, converted))
+
+        return root[0]
 
     def apply_outlier_processing(self):
         """Обработка выбросов в данных"""
@@ -1499,6 +1500,7 @@ class AirQualityAnalyzerGUI:
 
             # Обновляем данные
             self.data = cleaned_data
+            self._build_region_index()
             self.update_data_treeview()
 
             messagebox.showinfo("Успех",
@@ -1509,34 +1511,6 @@ class AirQualityAnalyzerGUI:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка обработки выбросов: {str(e)}")
 
-    def detect_anomalies_zscore(self, data, pollutant_column, threshold=3):
-        """Обнаружение аномалий методом Z-score"""
-        if pollutant_column not in data.columns:
-            return data, {'error': f'Колонка {pollutant_column} не найдена'}
-
-        working_data = data.copy()
-        working_data = working_data.dropna(subset=[pollutant_column])
-
-        if len(working_data) == 0:
-            return data, {'error': 'Нет данных для анализа'}
-
-        mean = working_data[pollutant_column].mean()
-        std = working_data[pollutant_column].std()
-
-        z_scores = (working_data[pollutant_column] - mean) / std
-        anomalies_mask = abs(z_scores) > threshold
-
-        clean_data = working_data[~anomalies_mask]
-        anomalies_data = working_data[anomalies_mask]
-
-        stats = {
-            'anomalies_detected': len(anomalies_data),
-            'anomaly_percentage': (len(anomalies_data) / len(working_data)) * 100,
-            'threshold_used': threshold
-        }
-
-        return clean_data, stats
-
     def detect_anomalies_iqr(self, data, pollutant_column):
         """Обнаружение аномалий методом IQR"""
         if pollutant_column not in data.columns:
@@ -3,26 +3,64 @@ import analysis_core as ac
 import pandas as pd
 import json
 import os
+import gc
 import numpy as np
 
 
 class NumpyEncoder(json.JSONEncoder):
     """Кастомный энкодер для numpy типов"""
 
+    # Быстрый путь: преобразование по точному типу объекта
+    _HANDLERS = {
+        np.int64: int,
+        np.int32: int,
+        np.float64: float,
+        np.float32: float,
+        np.ndarray: np.ndarray.tolist,
+        pd.Timestamp: pd.Timestamp.isoformat,
+    }
+
     def default(self, obj):
-        if isinstance(obj, (np.integer, np.int64, np.int32)):
+        handler = self._HANDLERS.get(type(obj))
+        if handler is not None:
+            return handler(obj)
+
+        # NaT проверяется до np.integer: np.timedelta64 - подкласс np.integer
+        if isinstance(obj, (np.datetime64, np.timedelta64)) and np.isnat(obj):
+            return None
+        elif isinstance(obj, np.integer):
             return int(obj)
-        elif isinstance(obj, (np.floating, np.float64, np.float32)):
+        elif isinstance(obj, np.floating):
             return float(obj)
         elif isinstance(obj, np.ndarray):
             return obj.tolist()
         elif isinstance(obj, pd.Timestamp):
             return obj.isoformat()
-        elif pd.isna(obj):
+        elif obj is pd.NaT or obj is pd.NA:
             return None
         return super().default(obj)
 
 
+def to_native(obj):
+    """
+    Преобразование numpy/pandas значений в нативные типы Python
+
+    Массивы конвертируются целиком через tolist(), поэтому json.dumps
+    не вызывает NumpyEncoder.default для каждого элемента.
+    """
+    if isinstance(obj, dict):
+        return {key: to_native(value) for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [to_native(item) for item in obj]
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, np.generic):
+        return obj.item()
+    elif isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    return obj
+
+
 def run_complete_analysis(file_path):
     """
     Запуск полного анализа для использования в GUI
@@ -53,12 +91,11 @@ def run_complete_analysis(file_path):
 
     # Определение целевого показателя
     numeric_columns = ['so2', 'no2', 'rspm', 'spm', 'pm2_5']
-    target_pollutant = None
+    present_columns = [col for col in numeric_columns if col in raw_data.columns]
 
-    for col in numeric_columns:
-        if col in raw_data.columns and raw_data[col].notna().sum() > 1000:
-            target_pollutant = col
-            break
+    # Один проход по всем колонкам вместо notna().sum() для каждой
+    non_null_counts = raw_data[present_columns].notna().sum()
+    target_pollutant = next((col for col in present_columns if non_null_counts[col] > 1000), None)
 
     if not target_pollutant:
         return {'error': 'Нет показателей с достаточным количеством данных'}
@@ -72,17 +109,25 @@ def run_complete_analysis(file_path):
 
     results['anomalies_stats'] = anomalies_stats
 
+    # Исходные данные дальше не нужны - освобождаем память до анализа
+    del raw_data
+
     # Подготовка данных для анализа
     analysis_data = dm.prepare_analysis_dataset(cleaned_data)
+    del cleaned_data
+    gc.collect()
 
     # Базовый анализ трендов
-    if 'date' in analysis_data.columns:
-        analysis_data['year'] = analysis_data['date'].dt.year
-        yearly_avg = analysis_data.groupby('year')[target_pollutant].mean().reset_index()
-
-        if len(yearly_avg) > 1:
-            first_val = float(yearly_avg.iloc[0][target_pollutant])
-            last_val = float(yearly_avg.iloc[-1][target_pollutant])
+    if 'date' in analysis_data.columns and not analysis_data.empty:
+        # Нужны только средние за первый и последний год - обходимся без groupby
+        years = analysis_data['date'].to_numpy().astype('datetime64[Y]').astype(np.int64) + 1970
+        values = analysis_data[target_pollutant].to_numpy(dtype=np.float64)
+        first_year, last_year = int(years.min()), int(years.max())
+        years_analyzed = int(np.count_nonzero(np.bincount(years - first_year)))
+
+        if years_analyzed > 1:
+            first_val = float(values[years == first_year].mean())
+            last_val = float(values[years == last_year].mean())
             change_percent = float(((last_val - first_val) / first_val) * 100)
 
             results['trend_analysis'] = {
@@ -90,21 +135,23 @@ def run_complete_analysis(file_path):
                 'change_percentage': abs(change_percent),
                 'first_year_avg': first_val,
                 'last_year_avg': last_val,
-                'years_analyzed': len(yearly_avg),
-                'period': f"{yearly_avg['year'].min()}-{yearly_avg['year'].max()}"
+                'years_analyzed': years_analyzed,
+                'period': f"{first_year}-{last_year}"
             }
 
     # Базовая статистика
     if target_pollutant in analysis_data.columns:
-        stats = analysis_data[target_pollutant].describe()
-        results['basic_statistics'] = {
-            'mean': float(stats['mean']),
-            'median': float(stats['50%']),
-            'max': float(stats['max']),
-            'min': float(stats['min']),
-            'std': float(stats['std']),
-            'count': int(stats['count'])
-        }
+        arr = analysis_data[target_pollutant].to_numpy(dtype=np.float64)
+        values = arr[~np.isnan(arr)]
+        if values.size:
+            results['basic_statistics'] = {
+                'mean': float(values.mean()),
+                'median': float(np.median(values)),
+                'max': float(values.max()),
+                'min': float(values.min()),
+                'std': float(values.std(ddof=1)) if values.size > 1 else float('nan'),
+                'count': int(values.size)
+            }
 
     print("✅ Анализ завершен успешно")
     return results
@@ -113,4 +160,4 @@ def run_complete_analysis(file_path):
 if __name__ == "__main__":
     # Тестирование функции
     results = run_complete_analysis('data/air_quality_data.csv')
-    print(json.dumps(results, indent=2, ensure_ascii=False, cls=NumpyEncoder))
\ No newline at end of file
+    print(json.dumps(to_native(results), indent=2, ensure_ascii=False, cls=NumpyEncoder))
\ No newline at end of file
@@ -8,62 +8,61 @@ class RegionalAnalyzer:
 
     def __init__(self, data):
         self.data = data
-        self.regions = self._extract_regions()
+        self.region_col, self.regions = self._extract_regions()
+        # Группировка строится один раз и переиспользуется для всех регионов
+        self.region_groups = (self.data.groupby(self.region_col, sort=False, observed=True)
+                              if self.region_col else None)
 
     def _extract_regions(self):
-        """Извлечение информации о регионах из данных"""
-        regions = {}
+        """Извлечение колонки регионов и множества их значений из данных"""
         region_columns = ['state', 'city', 'location', 'region', 'area']
 
         for col in region_columns:
             if col in self.data.columns:
-                unique_regions = self.data[col].dropna().unique()
-                for region in unique_regions:
-                    regions[region] = col
-                break  # Используем первую найденную колонку
+                # Используем первую найденную колонку
+                return col, frozenset(self.data[col].dropna().unique().tolist())
 
-        return regions
+        return None, frozenset()
 
-    def get_region_data(self, region_name):
-        """Получить данные для конкретного региона"""
+    def get_region_data(self, region_name, copy=False):
+        """Получить данные для конкретного региона (copy=True - если вызывающий код меняет данные)"""
         if region_name not in self.regions:
             return None
 
-        region_col = self.regions[region_name]
-        return self.data[self.data[region_col] == region_name].copy()
+        region_data = self.region_groups.get_group(region_name)
+        return region_data.copy() if copy else region_data
 
     def compare_regions(self, regions, pollutant, metric='mean'):
         """Сравнение регионов по указанному показателю"""
-        comparison = {}
-
-        for region in regions:
-            region_data = self.get_region_data(region)
-            if region_data is not None and pollutant in region_data.columns:
-                values = region_data[pollutant].dropna()
-
-                if metric == 'mean':
-                    comparison[region] = values.mean()
-                elif metric == 'median':
-                    comparison[region] = values.median()
-                elif metric == 'max':
-                    comparison[region] = values.max()
-                elif metric == 'min':
-                    comparison[region] = values.min()
-                elif metric == 'std':
-                    comparison[region] = values.std()
-
-        return comparison
+        if self.region_groups is None or pollutant not in self.data.columns:
+            return {}
+
+        if metric not in ('mean', 'median', 'max', 'min', 'std'):
+            return {}
+
+        # Одна агрегация по всем группам вместо расчета по каждому региону
+        # Неизвестные регионы пропускаются, известные сохраняют NaN (нет значений, std по одной строке)
+        values = self.region_groups[pollutant].agg(metric)
+        known_regions = [region for region in dict.fromkeys(regions) if region in self.regions]
+        return values.reindex(known_regions).to_dict()
+
+    def _iter_regions_for_analysis(self, regions):
+        """Данные выбранных регионов (в порядке запроса) с колонкой даты в формате анализа"""
+        if self.region_groups is None or 'date' not in self.data.columns:
+            return
+
+        for region in dict.fromkeys(regions):
+            if region in self.regions:
+                region_data = self.region_groups.get_group(region)
+                yield region, region_data.rename(columns={'date': 'timestamp'})
 
     def regional_trend_analysis(self, regions, pollutant):
         """Анализ трендов по регионам"""
         trends = {}
 
-        for region in regions:
-            region_data = self.get_region_data(region)
-            if region_data is not None and 'date' in region_data.columns:
-                region_data = region_data.rename(columns={'date': 'timestamp'})
-                trend = calculate_pollution_trend(region_data, pollutant, method='composite')
-                trends[region] = trend
+        for region, region_data in self._iter_regions_for_analysis(regions):
+            trend = calculate_pollution_trend(region_data, pollutant, method='composite')
+            trends[region] = trend
 
         return trends
 
@@ -71,12 +70,9 @@ class RegionalAnalyzer:
         """Прогнозирование по регионам"""
         forecasts = {}
 
-        for region in regions:
-            region_data = self.get_region_data(region)
-            if region_data is not None and 'date' in region_data.columns:
-                region_data = region_data.rename(columns={'date': 'timestamp'})
-                forecast = predict_future_levels(region_data, pollutant,
-                                                 forecast_horizon=horizon, method='hybrid')
-                forecasts[region] = forecast
+        for region, region_data in self._iter_regions_for_analysis(regions):
+            forecast = predict_future_levels(region_data, pollutant,
+                                             forecast_horizon=horizon, method='hybrid')
+            forecasts[region] = forecast
 
-        return forecasts
\ No newline at end of file
+        return forecasts
@@ -1,3 +1,9 @@
+import functools
+import io
+import os
+import textwrap
+import weakref
+import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.patches import Patch
@@ -6,23 +12,160 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-
-def setup_visualization_style():
-    """Настройка единого стиля визуализаций"""
+try:
+    import numba  # noqa: F401  JIT-ядра для rolling (необязательная зависимость)
+    _ROLLING_KWARGS = {'engine': 'numba', 'engine_kwargs': {'parallel': False}}
+except ImportError:
+    _ROLLING_KWARGS = {}
+
+# Минимальная длина ряда, начиная с которой компиляция numba окупается
+_NUMBA_ROLLING_MIN_POINTS = 10000
+
+# Пул переиспользуемых фигур: (nrows, ncols, figsize) -> [Figure, ...]
+_FIGURE_POOL = {}
+_FIGURE_POOL_KEYS = weakref.WeakKeyDictionary()
+
+# Подписи месяцев; индексируются номером месяца - 1
+_MONTH_NAMES = np.array(['Янв', 'Фев', 'Мар', 'Апр', 'Май', 'Июн',
+                         'Июл', 'Авг', 'Сен', 'Окт', 'Ноя', 'Дек'])
+
+# Числовые форматы подписей дат для ConciseDateFormatter (без английских названий месяцев)
+_DATE_TICK_FORMATS = ['%Y', '%m', '%d', '%H:%M', '%H:%M', '%S.%f']
+_DATE_OFFSET_FORMATS = ['', '%Y', '%Y-%m', '%Y-%m-%d', '%Y-%m-%d', '%Y-%m-%d %H:%M']
+
+# Отрисованные файлы фигур для save_visualization: fig -> ((dpi, format, изменений), bytes)
+_RENDER_CACHE = weakref.WeakKeyDictionary()
+
+# Единицы измерения; ключи в нижнем регистре, точка заменена на "_"
+_POLLUTANT_UNITS = {
+    'pm2_5': 'μg/m³',
+    'pm10': 'μg/m³',
+    'rspm': 'μg/m³',
+    'spm': 'μg/m³',
+    'so2': 'μg/m³',
+    'no2': 'μg/m³',
+    'co': 'ppm',
+    'o3': 'ppb',
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _apply_visualization_style():
+    """Применение стиля один раз за процесс"""
     plt.style.use('seaborn-v0_8-whitegrid')
     sns.set_palette("husl")
 
     # Кастомные настройки для лучшего отображения
-    plt.rcParams['figure.figsize'] = (12, 6)
-    plt.rcParams['font.size'] = 11
-    plt.rcParams['axes.titlesize'] = 14
-    plt.rcParams['axes.labelsize'] = 12
-    plt.rcParams['xtick.labelsize'] = 10
-    plt.rcParams['ytick.labelsize'] = 10
-    plt.rcParams['legend.fontsize'] = 10
-    plt.rcParams['figure.titlesize'] = 16
-    plt.rcParams['lines.linewidth'] = 1.5
-    plt.rcParams['lines.markersize'] = 3
+    plt.rcParams.update({
+        'figure.figsize': (12, 6),
+        'font.size': 11,
+        'axes.titlesize': 14,
+        'axes.labelsize': 12,
+        'xtick.labelsize': 10,
+        'ytick.labelsize': 10,
+        'legend.fontsize': 10,
+        'figure.titlesize': 16,
+        'lines.linewidth': 1.5,
+        'lines.markersize': 3,
+    })
+
+
+def setup_visualization_style(force=False):
+    """Настройка единого стиля визуализаций (force=True - применить повторно)"""
+    if force:
+        _apply_visualization_style.cache_clear()
+    _apply_visualization_style()
+
+
+def get_figure(nrows=1, ncols=1, figsize=(12, 6)):
+    """
+    Фигура с осями из пула (очищенная) или новая, если свободных нет
+
+    Создание Figure/Axes заметно дороже очистки готовой фигуры, поэтому
+    фигуры, которые больше не отображаются, стоит вернуть через release_figure.
+
+    Returns:
+    tuple: (matplotlib.figure.Figure, оси как у plt.subplots)
+    """
+    key = (nrows, ncols, tuple(figsize))
+    pool = _FIGURE_POOL.get(key)
+
+    if pool:
+        fig = pool.pop()
+        fig.clear()
+        # clear() не сбрасывает параметры самой фигуры, а FigureCanvasTkAgg
+        # меняет размер и dpi встроенных фигур - восстанавливаем их явно
+        fig.set_size_inches(figsize, forward=False)
+        fig.set_dpi(plt.rcParams['figure.dpi'])
+        fig.set_facecolor(plt.rcParams['figure.facecolor'])
+        fig.set_edgecolor(plt.rcParams['figure.edgecolor'])
+        fig.set_layout_engine('constrained')
+        axes = fig.subplots(nrows, ncols)
+    else:
+        fig, axes = plt.subplots(nrows, ncols, figsize=figsize, layout='constrained')
+        _FIGURE_POOL_KEYS[fig] = key
+
+    return fig, axes
+
+
+def release_figure(fig):
+    """Вернуть фигуру в пул; фигуры не из пула закрываются"""
+    key = _FIGURE_POOL_KEYS.get(fig)
+    if key is None:
+        plt.close(fig)
+        return
+
+    # Следующее использование фигуры из пула всегда рисует заново
+    _RENDER_CACHE.pop(fig, None)
+
+    pool = _FIGURE_POOL.setdefault(key, [])
+    if fig not in pool:
+        pool.append(fig)
+
+
+def get_date_formatter(locator):
+    """Компактный форматтер дат: подписи для всех делений locator строятся за один проход"""
+    return mdates.ConciseDateFormatter(locator, formats=_DATE_TICK_FORMATS,
+                                       offset_formats=_DATE_OFFSET_FORMATS)
+
+
+def _rolling_mean(series, window):
+    """
+    Скользящее среднее; длинные ряды считаются через numba, если она доступна
+
+    На коротких рядах компиляция ядра дороже самого расчета, поэтому
+    используется стандартная реализация pandas. Она же используется, если
+    установленная версия numba не подходит для pandas.
+    """
+    rolling = series.rolling(window=window, min_periods=1)
+    if _ROLLING_KWARGS and len(series) > _NUMBA_ROLLING_MIN_POINTS:
+        try:
+            return rolling.mean(**_ROLLING_KWARGS)
+        except ImportError:
+            pass
+    return rolling.mean()
+
+
+def m4_downsample(series, n_bins):
+    """
+    M4-прореживание ряда: первое, последнее, минимальное и максимальное
+    значение в каждом из n_bins интервалов. Визуально совпадает с исходной
+    линией, если n_bins не меньше ширины графика в пикселях.
+    """
+    if len(series) <= 4 * n_bins:
+        return series
+
+    series = series.dropna()
+    n = len(series)
+
+    bin_ids = np.arange(n) * n_bins // n
+    starts = np.flatnonzero(np.diff(bin_ids, prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+
+    groups = pd.Series(series.to_numpy(), index=np.arange(n)).groupby(bin_ids)
+    keep = np.unique(np.concatenate([starts, ends,
+                                     groups.idxmin().to_numpy(), groups.idxmax().to_numpy()]))
+    return series.iloc[keep]
 
 
 def create_simple_timeseries_plot(data, pollutant, region="Все регионы", period_text="", save_path=None):
@@ -50,30 +193,31 @@ def create_simple_timeseries_plot(data, pollutant, region="Все регионы
         print(f"Отсутствуют необходимые колонки: date или {pollutant}")
         return None
 
-    # Создаем копию и очищаем данные
-    plot_data = data[['date', pollutant]].copy()
-    plot_data = plot_data.dropna()
+    # Очищаем данные (dropna уже возвращает новый объект) и сортируем по индексу дат
+    plot_series = data[['date', pollutant]].dropna().set_index('date')[pollutant].sort_index()
 
-    if plot_data.empty:
+    if plot_series.empty:
         print("Нет данных после очистки")
         return None
 
-    # Сортируем по дате
-    plot_data = plot_data.sort_values('date')
-
     # Агрегируем по дням для уменьшения шума
-    daily_data = plot_data.set_index('date').resample('D').mean()
+    daily_values = plot_series.resample('D').mean()
 
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = get_figure(figsize=(14, 6))
+
+    # Ширина графика в пикселях при сохранении (dpi=300)
+    width_px = int(fig.get_size_inches()[0] * 300)
 
     # Основной график
-    ax.plot(daily_data.index, daily_data[pollutant],
+    # Передаем в matplotlib готовые массивы: даты в числовом формате, значения в float32
+    daily_series = m4_downsample(daily_values, width_px)
+    ax.plot(mdates.date2num(daily_series.index.to_numpy()), daily_series.to_numpy(dtype=np.float32),
             linewidth=1.5, color='steelblue', alpha=0.8, label='Среднесуточные значения')
 
     # Добавляем скользящее среднее для тренда
-    if len(daily_data) > 7:
-        rolling_avg = daily_data[pollutant].rolling(window=7, min_periods=1).mean()
-        ax.plot(daily_data.index, rolling_avg,
+    if len(daily_values) > 7:
+        rolling_avg = m4_downsample(_rolling_mean(daily_values, window=7), width_px)
+        ax.plot(mdates.date2num(rolling_avg.index.to_numpy()), rolling_avg.to_numpy(dtype=np.float32),
                 linewidth=2, color='red', alpha=0.9, label='Скользящее среднее (7 дней)')
 
     # Настройка оформления
@@ -86,21 +230,21 @@ def create_simple_timeseries_plot(data, pollutant, region="Все регионы
     ax.legend()
     ax.grid(True, alpha=0.3)
 
-    # Форматирование дат
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    # Форматирование дат (x передан числами, поэтому явно включаем ось дат)
+    ax.xaxis_date()
     ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+    ax.xaxis.set_major_formatter(get_date_formatter(ax.xaxis.get_major_locator()))
     plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
 
     # Добавляем статистику в углу
-    stats_text = f"Статистика:\nМин: {daily_data[pollutant].min():.1f}\nМакс: {daily_data[pollutant].max():.1f}\nСреднее: {daily_data[pollutant].mean():.1f}"
+    values = daily_values.to_numpy()
+    min_val, max_val, mean_val = np.nanmin(values), np.nanmax(values), np.nanmean(values)
+    stats_text = f"Статистика:\nМин: {min_val:.1f}\nМакс: {max_val:.1f}\nСреднее: {mean_val:.1f}"
     ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, verticalalignment='top',
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8), fontsize=10)
 
-    plt.tight_layout()
-
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"График сохранен: {save_path}")
+        save_visualization(fig, save_path)
 
     return fig
 
@@ -134,13 +278,17 @@ def create_pollutant_comparison_plot(data, pollutants, region="Все регио
     # Агрегируем по месяцам для сравнения
     monthly_data = data.set_index('date')[available_pollutants].resample('M').mean()
 
-    fig, ax = plt.subplots(figsize=(14, 7))
+    fig, ax = get_figure(figsize=(14, 7))
 
     colors = ['steelblue', 'red', 'green', 'orange', 'purple']
 
+    # Даты переводим в числовой формат matplotlib один раз для всех линий
+    xs = mdates.date2num(monthly_data.index.to_numpy())
+    values = monthly_data.to_numpy(dtype=np.float32)
+
     for i, pollutant in enumerate(available_pollutants):
         color = colors[i % len(colors)]
-        ax.plot(monthly_data.index, monthly_data[pollutant],
+        ax.plot(xs, values[:, i],
                 label=pollutant.upper(), color=color, linewidth=2, marker='o', markersize=3)
 
     region_info = f" - {region}" if region != "Все регионы" else ""
@@ -152,15 +300,13 @@ def create_pollutant_comparison_plot(data, pollutants, region="Все регио
     ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     ax.grid(True, alpha=0.3)
 
-    # Форматирование дат
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    # Форматирование дат (x передан числами, поэтому явно включаем ось дат)
+    ax.xaxis_date()
+    ax.xaxis.set_major_formatter(get_date_formatter(ax.xaxis.get_major_locator()))
     plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
 
-    plt.tight_layout()
-
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"График сравнения сохранен: {save_path}")
+        save_visualization(fig, save_path)
 
     return fig
 
@@ -185,13 +331,10 @@ def create_regional_comparison_plot(data, pollutant, region_col='state', top_n=1
         print("Нет данных для регионального сравнения")
         return None
 
-    # Группируем по регионам и вычисляем средние
-    regional_means = data.groupby(region_col)[pollutant].mean().sort_values(ascending=False)
-
-    # Берем топ-N регионов
-    top_regions = regional_means.head(top_n)
+    # Топ-N регионов по средней концентрации
+    top_regions = _top_regions_by_mean(data[region_col], data[pollutant], top_n)
 
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = get_figure(figsize=(12, 8))
 
     bars = ax.barh(range(len(top_regions)), top_regions.values,
                    color='lightcoral', alpha=0.8, edgecolor='darkred')
@@ -204,20 +347,39 @@ def create_regional_comparison_plot(data, pollutant, region_col='state', top_n=1
     ax.grid(True, alpha=0.3, axis='x')
 
     # Добавляем значения на столбцы
-    for i, bar in enumerate(bars):
-        width = bar.get_width()
-        ax.text(width + width * 0.01, bar.get_y() + bar.get_height() / 2,
-                f'{width:.1f}', ha='left', va='center', fontsize=10)
-
-    plt.tight_layout()
+    ax.bar_label(bars, fmt='%.1f', padding=3, fontsize=10)
 
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"График регионов сохранен: {save_path}")
+        save_visualization(fig, save_path)
 
     return fig
 
 
+def _top_regions_by_mean(regions, values, top_n):
+    """
+    Средние по регионам и выбор топ-N за один линейный проход:
+    коды регионов через factorize, суммы и количества через bincount,
+    частичная сортировка только для top_n значений.
+    """
+    codes, uniques = pd.factorize(regions)
+    values = values.to_numpy(dtype=np.float64)
+
+    valid = (codes >= 0) & ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=len(uniques))
+    counts = np.bincount(codes[valid], minlength=len(uniques))
+
+    present = np.flatnonzero(counts)
+    means = sums[present] / counts[present]
+
+    if len(present) > top_n:
+        candidates = np.argpartition(-means, top_n - 1)[:top_n]
+    else:
+        candidates = np.arange(len(present))
+    top = candidates[np.argsort(-means[candidates], kind='stable')]
+
+    return pd.Series(means[top], index=uniques[present[top]])
+
+
 def create_monthly_trend_plot(data, pollutant, region="Все регионы", save_path=None):
     """
     График средних месячных значений за все годы
@@ -237,25 +399,28 @@ def create_monthly_trend_plot(data, pollutant, region="Все регионы", s
         print("Нет данных для месячного тренда")
         return None
 
-    # Извлекаем год и месяц
-    plot_data = data[['date', pollutant]].copy()
-    plot_data = plot_data.dropna()
-    plot_data['year'] = plot_data['date'].dt.year
-    plot_data['month'] = plot_data['date'].dt.month
+    # Извлекаем месяц
+    plot_data = data[['date', pollutant]].dropna()
+    if plot_data.empty:
+        print("Нет данных для месячного тренда")
+        return None
 
-    # Средние по месяцам
-    monthly_avg = plot_data.groupby('month')[pollutant].mean()
+    months_idx = plot_data['date'].dt.month.to_numpy()
+    values = plot_data[pollutant].to_numpy(dtype=np.float64)
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    # Средние по месяцам через bincount (12 корзин), месяцы без данных - NaN
+    sums = np.bincount(months_idx, weights=values, minlength=13)[1:]
+    counts = np.bincount(months_idx, minlength=13)[1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        monthly_avg = sums / counts
 
-    months = ['Янв', 'Фев', 'Мар', 'Апр', 'Май', 'Июн',
-              'Июл', 'Авг', 'Сен', 'Окт', 'Ноя', 'Дек']
+    fig, ax = get_figure(figsize=(12, 6))
 
-    ax.plot(range(1, 13), monthly_avg.values, marker='o', linewidth=2.5,
+    ax.plot(range(1, 13), monthly_avg, marker='o', linewidth=2.5,
             color='teal', markersize=8, markerfacecolor='orange')
 
     ax.set_xticks(range(1, 13))
-    ax.set_xticklabels(months)
+    ax.set_xticklabels(_MONTH_NAMES)
     ax.set_xlabel('Месяц', fontsize=12)
     ax.set_ylabel(f'Концентрация ({get_pollutant_unit(pollutant)})', fontsize=12)
 
@@ -264,18 +429,16 @@ def create_monthly_trend_plot(data, pollutant, region="Все регионы", s
     ax.grid(True, alpha=0.3)
 
     # Подсветка максимального и минимального месяцев
-    max_month = monthly_avg.idxmax()
-    min_month = monthly_avg.idxmin()
+    # (по тому же массиву; nan-версии пропускают месяцы без данных)
+    max_month = int(np.nanargmax(monthly_avg)) + 1
+    min_month = int(np.nanargmin(monthly_avg)) + 1
 
-    ax.axvline(x=max_month, color='red', alpha=0.3, linestyle='--', label=f'Макс: {months[max_month - 1]}')
-    ax.axvline(x=min_month, color='green', alpha=0.3, linestyle='--', label=f'Мин: {months[min_month - 1]}')
+    ax.axvline(x=max_month, color='red', alpha=0.3, linestyle='--', label=f'Макс: {_MONTH_NAMES[max_month - 1]}')
+    ax.axvline(x=min_month, color='green', alpha=0.3, linestyle='--', label=f'Мин: {_MONTH_NAMES[min_month - 1]}')
     ax.legend()
 
-    plt.tight_layout()
-
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"График месячных трендов сохранен: {save_path}")
+        save_visualization(fig, save_path)
 
     return fig
 
@@ -307,7 +470,7 @@ def create_yearly_summary_plot(data, pollutant, region="Все регионы",
     # Средние по годам
     yearly_avg = plot_data.groupby('year')[pollutant].mean()
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = get_figure(figsize=(12, 6))
 
     bars = ax.bar(yearly_avg.index, yearly_avg.values,
                   color='skyblue', alpha=0.8, edgecolor='navy')
@@ -320,10 +483,7 @@ def create_yearly_summary_plot(data, pollutant, region="Все регионы",
     ax.grid(True, alpha=0.3, axis='y')
 
     # Добавляем значения на столбцы
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width() / 2., height + height * 0.01,
-                f'{height:.1f}', ha='center', va='bottom', fontsize=10)
+    ax.bar_label(bars, fmt='%.1f', padding=3, fontsize=10)
 
     # Линия тренда
     if len(yearly_avg) > 1:
@@ -332,11 +492,8 @@ def create_yearly_summary_plot(data, pollutant, region="Все регионы",
         ax.plot(yearly_avg.index, p(yearly_avg.index), "r--", alpha=0.8, linewidth=2, label='Тренд')
         ax.legend()
 
-    plt.tight_layout()
-
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"График годовой динамики сохранен: {save_path}")
+        save_visualization(fig, save_path)
 
     return fig
 
@@ -354,58 +511,42 @@ def create_aqi_dashboard(aqi_results, save_path=None):
         return None
 
     # Создаем ОДИН график вместо дашборда
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-    fig.suptitle('Индекс качества воздуха (AQI)', fontsize=14, y=0.95)
+    fig, (ax1, ax2) = get_figure(1, 2, figsize=(12, 5))
+    fig.suptitle('Индекс качества воздуха (AQI)', fontsize=14)
 
     # ЛЕВАЯ ЧАСТЬ: AQI по загрязнителям
-    pollutants_data = []
+    pollutants = []
+    aqis = []
+    colors = []
     for poll, data in aqi_results.items():
         if poll != 'overall':
-            pollutants_data.append({
-                'pollutant': poll.upper(),
-                'aqi': data['aqi'],
-                'concentration': data['concentration'],
-                'category': data['category'],
-                'color': data['color']
-            })
-
-    if pollutants_data:
-        pollutants_df = pd.DataFrame(pollutants_data)
-
-        bars = ax1.bar(range(len(pollutants_df)), pollutants_df['aqi'],
-                       color=pollutants_df['color'], alpha=0.8,
+            pollutants.append(poll.upper())
+            aqis.append(data['aqi'])
+            colors.append(data['color'])
+
+    if pollutants:
+        bars = ax1.bar(range(len(pollutants)), aqis,
+                       color=colors, alpha=0.8,
                        edgecolor='black', linewidth=1)
 
         ax1.set_title('AQI по загрязнителям', fontsize=12, pad=10)
         ax1.set_ylabel('Значение AQI', fontsize=10)
-        ax1.set_ylim(0, max(pollutants_df['aqi']) * 1.1)
-        ax1.set_xticks(range(len(pollutants_df)))
-        ax1.set_xticklabels(pollutants_df['pollutant'], fontsize=9)
+        ax1.set_ylim(0, max(aqis) * 1.1)
+        ax1.set_xticks(range(len(pollutants)))
+        ax1.set_xticklabels(pollutants, fontsize=9)
         ax1.grid(True, alpha=0.3, axis='y')
 
         # Значения НАД столбцами
-        for bar, aqi_val in zip(bars, pollutants_df['aqi']):
-            ax1.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 3,
-                     f'{aqi_val:.0f}', ha='center', va='bottom',
-                     fontweight='bold', fontsize=9)
+        ax1.bar_label(bars, fmt='%.0f', padding=3, fontweight='bold', fontsize=9)
 
     # ПРАВАЯ ЧАСТЬ: Информация и рекомендации
     overall_aqi = aqi_results['overall']['aqi']
     health_advice = aqi_results['overall']['category']
     dominant_poll = aqi_results['overall']['dominant_pollutant']
     specific_advice = aqi_results[dominant_poll]['health_advice']
-    if len(specific_advice) > 100:
-        words = specific_advice.split()
-        lines = []
-        current_line = ""
-        for word in words:
-            if len(current_line + " " + word) <= 40:
-                current_line += " " + word
-            else:
-                lines.append(current_line.strip())
-                current_line = word
-        lines.append(current_line.strip())
-        specific_advice = "\n".join(lines)
+    # Переносим всегда: constrained layout не расширяет фигуру под текст,
+    # выходящий за пределы осей, и длинная строка обрезалась бы по краю
+    specific_advice = textwrap.fill(specific_advice, width=40)
 
     # Обрезаем длинный текст
     if len(specific_advice) > 120:
@@ -441,35 +582,121 @@ def create_aqi_dashboard(aqi_results, save_path=None):
     ax2.legend(handles=legend_elements, loc='lower center',
                bbox_to_anchor=(0.5, -0.2), ncol=3, fontsize=8)
 
-    plt.tight_layout()
-    plt.subplots_adjust(bottom=0.25)  # Место для легенды
-
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"Дашборд AQI сохранен: {save_path}")
+        save_visualization(fig, save_path)
 
     return fig
 
 
+@functools.lru_cache(maxsize=64)
 def get_pollutant_unit(pollutant):
-    """Получение единиц измерения для загрязнителя"""
-    units = {
-        'PM2.5': 'μg/m³',
-        'PM10': 'μg/m³',
-        'NO2': 'ppb',
-        'SO2': 'ppb',
-        'CO': 'ppm',
-        'O3': 'ppb',
-        'so2': 'μg/m³',
-        'no2': 'μg/m³',
-        'rspm': 'μg/m³',
-        'spm': 'μg/m³',
-        'pm2_5': 'μg/m³'
-    }
-    return units.get(pollutant.lower(), 'units')
+    """Получение единиц измерения для загрязнителя (результат кэшируется по имени)"""
+    return _POLLUTANT_UNITS.get(pollutant.lower().replace('.', '_'), 'units')
+
+
+class _ChangeCounter:
+    """
+    Счетчик изменений фигуры
+
+    Устанавливается как fig.stale_callback: matplotlib вызывает его при каждой
+    пометке фигуры устаревшей (в том числе от дочерних объектов). Прежний
+    обработчик вызывается как обычно.
+    """
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.count = 0
+
+    def __call__(self, artist, val):
+        self.count += 1
+        if self.previous is not None:
+            self.previous(artist, val)
+
+
+def _change_counter(fig):
+    """Счетчик изменений фигуры (устанавливается при первом обращении)"""
+    counter = fig.stale_callback
+    if not isinstance(counter, _ChangeCounter):
+        # Счетчик новый - закэшированный ранее файл сопоставить с ним нельзя
+        _RENDER_CACHE.pop(fig, None)
+        counter = fig.stale_callback = _ChangeCounter(counter)
+    return counter
 
 
 def save_visualization(fig, filename, dpi=300):
-    """Универсальная функция сохранения визуализации"""
-    fig.savefig(filename, dpi=dpi, bbox_inches='tight', facecolor='white')
-    print(f"Визуализация сохранена: {filename}")
\ No newline at end of file
+    """
+    Универсальная функция сохранения визуализации
+
+    Отрисованный файл кэшируется для фигуры: повторное сохранение
+    неизмененной фигуры с теми же dpi и форматом не перерисовывает ее.
+    Фигуры создаются с layout='constrained', поэтому bbox_inches='tight'
+    (дополнительный полный проход отрисовки) не используется.
+    """
+    file_format = os.path.splitext(filename)[1].lstrip('.').lower() or 'png'
+    counter = _change_counter(fig)
+    cached = _RENDER_CACHE.get(fig)
+
+    if cached is not None and cached[0] == (dpi, file_format, counter.count):
+        content = cached[1]
+    else:
+        buffer = io.BytesIO()
+        # Для PNG снижаем уровень сжатия: кодирование заметно быстрее при почти том же размере
+        extra_kwargs = {'pil_kwargs': {'compress_level': 3}} if file_format == 'png' else {}
+        fig.savefig(buffer, format=file_format, dpi=dpi, facecolor='white', **extra_kwargs)
+        content = buffer.getvalue()
+        # Значение счетчика берем после savefig: восстановление dpi и facecolor
+        # внутри savefig тоже считается изменением, но содержимое от него не меняется
+        _RENDER_CACHE[fig] = ((dpi, file_format, counter.count), content)
+
+    with open(filename, 'wb') as f:
+        f.write(content)
+    print(f"Визуализация сохранена: {filename}")
+
+
+# Графики, доступные в render_all по имени
+_PLOT_FUNCTIONS = {
+    func.__name__: func
+    for func in (create_simple_timeseries_plot, create_pollutant_comparison_plot,
+                 create_regional_comparison_plot, create_monthly_trend_plot,
+                 create_yearly_summary_plot, create_aqi_dashboard)
+}
+
+
+def _render_spec(spec):
+    """Построение одного графика в рабочем процессе, возвращает PNG в байтах"""
+    matplotlib.use('Agg')
+
+    plot_func = _PLOT_FUNCTIONS[spec['plot']]
+    fig = plot_func(**spec.get('kwargs', {}))
+    if fig is None:
+        return None
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=spec.get('dpi', 300), facecolor='white',
+                pil_kwargs={'compress_level': 3})
+    release_figure(fig)
+    return buffer.getvalue()
+
+
+def render_all(dashboard_specs, n_jobs=-1, batch_size=4):
+    """
+    Параллельное построение набора графиков в отдельных процессах
+
+    Parameters:
+    dashboard_specs (list): описания графиков вида
+        {'plot': 'create_aqi_dashboard', 'kwargs': {...}, 'dpi': 300}
+    n_jobs (int): количество процессов (-1 - все ядра)
+    batch_size (int): графиков на одну передачу задаче, снижает накладные расходы IPC
+
+    Returns:
+    list: PNG в байтах для каждого описания (None, если график не построен)
+    """
+    unknown = sorted({spec['plot'] for spec in dashboard_specs} - _PLOT_FUNCTIONS.keys())
+    if unknown:
+        raise ValueError(f"Неизвестные графики: {unknown}. Доступны: {sorted(_PLOT_FUNCTIONS)}")
+
+    from joblib import Parallel, delayed  # нужен только для пакетного построения
+
+    return Parallel(n_jobs=n_jobs, backend='loky', batch_size=batch_size)(
+        delayed(_render_spec)(spec) for spec in dashboard_specs
+    )